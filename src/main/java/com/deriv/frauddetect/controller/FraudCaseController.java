@@ -1,7 +1,6 @@
 package com.deriv.frauddetect.controller;
 
 import com.deriv.frauddetect.entity.FraudCase;
-import com.deriv.frauddetect.enums.CaseStatus;
 import com.deriv.frauddetect.service.FraudCaseService;
 import jakarta.persistence.EntityNotFoundException;
 import lombok.RequiredArgsConstructor;
@@ -9,7 +8,6 @@ import lombok.extern.slf4j.Slf4j;
 import org.springframework.http.ResponseEntity;
 import org.springframework.web.bind.annotation.*;
 
-import java.math.BigDecimal;
 import java.util.Map;
 
 @RestController
@@ -44,6 +42,10 @@ public class FraudCaseController {
             return ResponseEntity.ok(updated);
         } catch (EntityNotFoundException e) {
             return ResponseEntity.notFound().build();
+        } catch (ClassCastException e) {
+            // A payload field had the wrong JSON type; the message is enough, skip the stack trace
+            log.warn("Rejected AI update for case {}: {}", payload.get("caseId"), e.getMessage());
+            return ResponseEntity.badRequest().build();
         } catch (Exception e) {
             log.error("Failed to update fraud case from AI", e);
             return ResponseEntity.badRequest().build();
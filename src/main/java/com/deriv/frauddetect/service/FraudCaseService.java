@@ -37,6 +37,7 @@ public class FraudCaseService {
     /**
      * Update an existing fraud case
      */
+    @Transactional
     public FraudCase processAiUpdate(Map<String, Object> payload) {
         String caseId = (String) payload.get("caseId");
 
@@ -46,8 +47,9 @@ public class FraudCaseService {
         fraudCase.setAiReasoning((String) payload.get("aiReasoning"));
         fraudCase.setAiRecommendations((String) payload.get("aiRecommendations"));
 
-        if (payload.get("confidenceScore") != null) {
-            double confidence = ((Number) payload.get("confidenceScore")).doubleValue();
+        Object confidenceScore = payload.get("confidenceScore");
+        if (confidenceScore != null) {
+            double confidence = ((Number) confidenceScore).doubleValue();
             fraudCase.setConfidenceScore(BigDecimal.valueOf(confidence));
         }
 
@@ -67,16 +69,16 @@ public class FraudCaseService {
             fraudCase.setStatus(CaseStatus.UNDER_INVESTIGATION);
         }
 
-        if (payload.get("detectionSignals") != null) {
-            @SuppressWarnings("unchecked")
-            Map<String, Object> signals = (Map<String, Object>) payload.get("detectionSignals");
-            fraudCase.setDetectionSignals(signals);
+        @SuppressWarnings("unchecked")
+        Map<String, Object> detectionSignals = (Map<String, Object>) payload.get("detectionSignals");
+        if (detectionSignals != null) {
+            fraudCase.setDetectionSignals(detectionSignals);
         }
 
-        if (payload.get("ai_signals") != null) {
-            @SuppressWarnings("unchecked")
-            Map<String, Object> signals = (Map<String, Object>) payload.get("ai_signals");
-            fraudCase.setAiSignals(signals);
+        @SuppressWarnings("unchecked")
+        Map<String, Object> aiSignals = (Map<String, Object>) payload.get("ai_signals");
+        if (aiSignals != null) {
+            fraudCase.setAiSignals(aiSignals);
         }
 
         return updateCase(fraudCase);
@@ -98,11 +100,12 @@ public class FraudCaseService {
         }
 
         FraudCase fc = optional.get();
+        Instant now = Instant.now();
         fc.setHumanDecision(humanDecision);
-        fc.setResolvedAt(Instant.now());
+        fc.setResolvedAt(now);
         fc.setResolutionNotes(resolutionNotes);
         fc.setStatus(CaseStatus.RESOLVED);
-        fc.setUpdatedAt(Instant.now());
+        fc.setUpdatedAt(now);
 
         return fraudCaseRepository.save(fc);
     }
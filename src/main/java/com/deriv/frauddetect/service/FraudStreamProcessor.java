@@ -5,15 +5,19 @@ import com.deriv.frauddetect.entity.FraudCase;
 import com.deriv.frauddetect.enums.CaseStatus;
 import com.deriv.frauddetect.repository.FraudCaseRepository;
 import com.fasterxml.jackson.databind.ObjectMapper;
+import com.fasterxml.jackson.databind.ObjectReader;
+import com.fasterxml.jackson.databind.ObjectWriter;
 import jakarta.annotation.PostConstruct;
 import lombok.RequiredArgsConstructor;
 import lombok.extern.slf4j.Slf4j;
 import org.springframework.data.redis.connection.stream.*;
+import org.springframework.data.redis.core.RedisOperations;
 import org.springframework.data.redis.core.RedisTemplate;
+import org.springframework.data.redis.core.SessionCallback;
+import org.springframework.data.redis.core.StreamOperations;
 import org.springframework.scheduling.annotation.Scheduled;
 import org.springframework.stereotype.Service;
 
-import java.math.BigDecimal;
 import java.time.Instant;
 import java.util.*;
 
@@ -32,10 +36,20 @@ public class FraudStreamProcessor {
     private static final String CONSUMER_GROUP = "fraud-detector1";
     private static final String CONSUMER_NAME = "processor-1";
     private static final String AI_QUEUE = "fraud:investigation:queue";
+    // Every this many stream records, pending gray-area cases are pipelined to the AI queue and
+    // finished records are acked, so with the per-record pacing below nothing waits for the whole batch
+    private static final int AI_QUEUE_FLUSH_INTERVAL = 10;
     private long lastCheckTime = System.currentTimeMillis();
 
+    // Bound once to TransactionEvent; the mapper already caches (de)serializers, so this is
+    // not a speedup. The writer always serializes as TransactionEvent, not the runtime class
+    private ObjectReader eventReader;
+    private ObjectWriter eventWriter;
+
     @PostConstruct
     public void initGroup() {
+        eventReader = objectMapper.readerFor(TransactionEvent.class);
+        eventWriter = objectMapper.writerFor(TransactionEvent.class);
         try {
             redisTemplate.opsForStream().createGroup(STREAM_KEY, ReadOffset.latest(), CONSUMER_GROUP);
 //            redisTemplate.opsForStream().createGroup(STREAM_KEY, ReadOffset.from("0"), CONSUMER_GROUP);
@@ -65,12 +79,18 @@ public class FraudStreamProcessor {
 
         log.info("STREAM BATCH: Found {} new transactions to process", records.size());
 
-        List<TransactionEvent> grayArea = new ArrayList<>();
+        List<RecordId> processedIds = new ArrayList<>(AI_QUEUE_FLUSH_INTERVAL);
+        List<TransactionEvent> pendingAi = new ArrayList<>();
+        List<RecordId> pendingAiIds = new ArrayList<>();
+        int approvedCount = 0;
+        int blockedCount = 0;
+        int grayAreaCount = 0;
+        int ackedCount = 0;
+        int seen = 0;
 
         for (MapRecord<String, Object, Object> record : records) {
             String txId = record.getId().getValue();
-            log.info("===================================================");
-            log.info("START: Processing Tx ID: {}", txId);
+            log.debug("START: Processing Tx ID: {}", txId);
             try {Thread.sleep(500);} catch (Exception e){}
             try {
                 TransactionEvent event = parseEvent(record);
@@ -78,30 +98,53 @@ public class FraudStreamProcessor {
                 String caseId = "CASE-" + Instant.now().toEpochMilli();
                 event.setCaseId(caseId);
                 if (result.isDefinitive()) {
-                    log.warn("FRAUD CHECK: Tx {} is DEFINITIVE ({})", txId, result);
-                    saveFraudCase(event, result.getDecision());
+                    boolean blocked = result.getDecision() == CaseStatus.AUTO_BLOCKED;
+                    if (blocked) {
+                        log.warn("FRAUD CHECK: Tx {} is DEFINITIVE ({})", txId, result);
+                    } else {
+                        log.debug("FRAUD CHECK: Tx {} is DEFINITIVE ({})", txId, result);
+                    }
+                    // A case that never reached the DB stays pending like any other failure
+                    if (saveFraudCase(event, result.getDecision())) {
+                        if (blocked) {
+                            blockedCount++;
+                        } else {
+                            approvedCount++;
+                        }
+                        processedIds.add(record.getId());
+                    }
                 } else {
-                    log.info("GRAY AREA: Tx {} requires AI investigation", txId);
+                    log.debug("GRAY AREA: Tx {} requires AI investigation", txId);
                     // 1. Generate the Case ID here so you can link it
 
                     // 2. Save the case to the DB now with status 'PENDING' or 'UNDER_INVESTIGATION'
                     // You might need a method like saveInitialFraudCase(event, caseId)
-                    saveFraudCase(event, CaseStatus.UNDER_INVESTIGATION);
-                    grayArea.add(event);
+                    if (saveFraudCase(event, CaseStatus.UNDER_INVESTIGATION)) {
+                        grayAreaCount++;
 
-                    queueForAIInvestigation(grayArea, caseId);
+                        // Ack only once the case has reached the AI queue
+                        pendingAi.add(event);
+                        pendingAiIds.add(record.getId());
+                    }
                 }
 
-                // Acknowledge the message so Redis knows we're done
-                redisTemplate.opsForStream().acknowledge(STREAM_KEY, CONSUMER_GROUP, record.getId());
-                log.info("ACK: Tx {} cleared from stream", txId);
-
             } catch (Exception e) {
                 log.error("ERROR: Failed processing Tx {}: {}", txId, e.getMessage());
             }
+
+            if (++seen % AI_QUEUE_FLUSH_INTERVAL == 0) {
+                ackedCount += checkpoint(pendingAi, pendingAiIds, processedIds);
+            }
         }
 
-        log.info("BATCH COMPLETE: Processed {} records", records.size());
+        ackedCount += checkpoint(pendingAi, pendingAiIds, processedIds);
+        if (ackedCount > 0) {
+            log.info("ACK: {} records cleared from stream", ackedCount);
+        }
+
+        log.info("BATCH COMPLETE: Processed {} records ({} approved, {} blocked, {} gray area, {} failed)",
+                records.size(), approvedCount, blockedCount, grayAreaCount,
+                records.size() - ackedCount);
     }
 
 
@@ -119,7 +162,7 @@ public class FraudStreamProcessor {
         // -------------------- Definitive rules --------------------
         if (ip != null && ip.isSanctionedCountry()) {
             result.setDecision(CaseStatus.AUTO_BLOCKED);
-            result.setConfidence(BigDecimal.ONE.doubleValue());
+            result.setConfidence(1.0);
             result.addSignal("sanctions_match", "Accessing from sanctioned country");
             return result;
         }
@@ -129,7 +172,7 @@ public class FraudStreamProcessor {
             double amount = event.getAmount().doubleValue();
             if (declaredIncome > 0 && amount > declaredIncome * 15) {
                 result.setDecision(CaseStatus.AUTO_BLOCKED);
-                result.setConfidence(BigDecimal.valueOf(0.98).doubleValue());
+                result.setConfidence(0.98);
                 result.addSignal("income_mismatch",
                         String.format("Deposit %.2f > 1500%% of declared income %.2f", amount, declaredIncome));
                 return result;
@@ -160,19 +203,19 @@ public class FraudStreamProcessor {
             signals.put("document_issues", doc.getConfidenceScore());
         }
 
-        result.setRiskScore(BigDecimal.valueOf(riskScore).doubleValue());
+        result.setRiskScore(riskScore);
         result.setSignals(signals);
 
         // -------------------- Thresholds --------------------
         if (riskScore < 0.15) {
             result.setDecision(CaseStatus.AUTO_APPROVED);
-            result.setConfidence(BigDecimal.valueOf(0.95).doubleValue());
+            result.setConfidence(0.95);
         } else if (riskScore > 0.75) {
             result.setDecision(CaseStatus.AUTO_BLOCKED);
-            result.setConfidence(BigDecimal.valueOf(0.96).doubleValue());
+            result.setConfidence(0.96);
         } else {
             result.setDecision(CaseStatus.UNDER_INVESTIGATION);
-            result.setConfidence(BigDecimal.valueOf(0.50).doubleValue());
+            result.setConfidence(0.50);
         }
 
         return result;
@@ -181,7 +224,7 @@ public class FraudStreamProcessor {
     // ---------------------------
     // Save Fraud Case
     // ---------------------------
-    private void saveFraudCase(TransactionEvent event, CaseStatus status) {
+    private boolean saveFraudCase(TransactionEvent event, CaseStatus status) {
 //        FraudCase fc = new FraudCase();
 //
 //        // Use the ID generated for AI, or create a new one for definitive cases
@@ -258,38 +301,109 @@ public class FraudStreamProcessor {
         fraudCase.setInvestigationLayers(List.of("RULE_BASED"));
 
         // 6. Save to DB
+        FraudCase saved;
         try {
-            var saved = fraudCaseRepository.saveAndFlush(fraudCase);
-            if (status.equals(CaseStatus.UNDER_INVESTIGATION)) {
-                alertService.pushToDashboard(saved);
-            }
-            log.info("SUCCESS: Initialized FraudCase {} for user {}", event.getCaseId(), event.getUserId());
+            saved = fraudCaseRepository.saveAndFlush(fraudCase);
+            log.debug("SUCCESS: Initialized FraudCase {} for user {}", event.getCaseId(), event.getUserId());
         } catch (Exception e) {
             log.error("CRITICAL: Failed to save FraudCase to DB: {}", e.getMessage());
+            return false;
+        }
+
+        // 7. The row is committed, so a failed dashboard push must not hold the case back
+        if (status.equals(CaseStatus.UNDER_INVESTIGATION)) {
+            try {
+                alertService.pushToDashboard(saved);
+            } catch (Exception e) {
+                log.warn("Failed to push FraudCase {} to dashboard: {}", event.getCaseId(), e.getMessage());
+            }
+        }
+        return true;
+    }
+
+    // ---------------------------
+    // Checkpoint: queue pending AI cases, then ack what is done
+    // ---------------------------
+    private int checkpoint(List<TransactionEvent> pendingAi, List<RecordId> pendingAiIds, List<RecordId> processedIds) {
+        flushAIQueue(pendingAi, pendingAiIds, processedIds);
+        if (processedIds.isEmpty()) {
+            return 0;
         }
 
+        // One XACK per checkpoint; failed records stay pending
+        int acked = processedIds.size();
+        try {
+            redisTemplate.opsForStream().acknowledge(STREAM_KEY, CONSUMER_GROUP,
+                    processedIds.toArray(new RecordId[0]));
+        } catch (Exception e) {
+            log.error("CRITICAL: Failed to ack stream records {}: {}", processedIds, e.getMessage());
+            acked = 0;
+        }
+        processedIds.clear();
+        return acked;
     }
 
     // ---------------------------
     // Push gray-area transactions to AI
     // ---------------------------
-    private void queueForAIInvestigation(List<TransactionEvent> events, String caseId) {
-        for (TransactionEvent event : events) {
+    private void flushAIQueue(List<TransactionEvent> events, List<RecordId> recordIds, List<RecordId> processedIds) {
+        if (events.isEmpty()) {
+            return;
+        }
+        processedIds.addAll(queueForAIInvestigation(events, recordIds));
+        events.clear();
+        recordIds.clear();
+    }
+
+    /**
+     * Returns the ids of the source records whose case actually reached the AI queue
+     */
+    private List<RecordId> queueForAIInvestigation(List<TransactionEvent> events, List<RecordId> recordIds) {
+
+        List<MapRecord<String, String, String>> aiRecords = new ArrayList<>(events.size());
+        List<RecordId> queuedIds = new ArrayList<>(events.size());
+        for (int i = 0; i < events.size(); i++) {
+            TransactionEvent event = events.get(i);
             try {
                 Map<String, String> payload = new HashMap<>();
-                payload.put("case_id", caseId);
+                payload.put("case_id", event.getCaseId());
                 payload.put("user_id", event.getUserId());
-                payload.put("event_data", objectMapper.writeValueAsString(event));
+                payload.put("event_data", eventWriter.writeValueAsString(event));
 
-                redisTemplate.opsForStream().add(
-                        StreamRecords.newRecord().in(AI_QUEUE).ofMap(payload)
-                );
+                aiRecords.add(StreamRecords.newRecord().in(AI_QUEUE).ofMap(payload));
+                queuedIds.add(recordIds.get(i));
             } catch (Exception e) {
                 log.error("Failed to enqueue AI investigation for user {}: {}", event.getUserId(), e.getMessage());
             }
         }
 
-        log.info("Queued {} transactions for AI investigation", events.size());
+        if (aiRecords.isEmpty()) {
+            return queuedIds;
+        }
+
+        // One pipelined round trip per chunk instead of an XADD per case
+        try {
+            redisTemplate.executePipelined(new SessionCallback<Object>() {
+                @Override
+                @SuppressWarnings("unchecked")
+                public <K, V> Object execute(RedisOperations<K, V> operations) {
+                    StreamOperations<String, String, String> streamOps =
+                            ((RedisOperations<String, String>) operations).opsForStream();
+                    for (MapRecord<String, String, String> aiRecord : aiRecords) {
+                        streamOps.add(aiRecord);
+                    }
+                    return null;
+                }
+            });
+        } catch (Exception e) {
+            // Source records stay unacked; nothing reclaims them, so name the cases for manual requeue
+            log.error("CRITICAL: Failed to enqueue AI investigation for cases {}: {}",
+                    events.stream().map(TransactionEvent::getCaseId).toList(), e.getMessage());
+            return List.of();
+        }
+
+        log.debug("Queued {} transactions for AI investigation", aiRecords.size());
+        return queuedIds;
     }
 
     // ---------------------------
@@ -302,7 +416,7 @@ public class FraudStreamProcessor {
         }
 
         String json = raw.toString(); // safely convert Object → String
-        return objectMapper.readValue(json, TransactionEvent.class);
+        return eventReader.readValue(json);
     }
 
 
@@ -0,0 +1,168 @@
+package com.deriv.frauddetect.service;
+
+import com.deriv.frauddetect.config.RedisConfig;
+import com.deriv.frauddetect.entity.FraudCase;
+import com.deriv.frauddetect.repository.FraudCaseRepository;
+import org.junit.jupiter.api.BeforeEach;
+import org.junit.jupiter.api.Test;
+import org.mockito.ArgumentCaptor;
+import org.springframework.data.redis.RedisConnectionFailureException;
+import org.springframework.data.redis.connection.stream.*;
+import org.springframework.data.redis.core.RedisOperations;
+import org.springframework.data.redis.core.RedisTemplate;
+import org.springframework.data.redis.core.SessionCallback;
+import org.springframework.data.redis.core.StreamOperations;
+
+import java.util.List;
+import java.util.Map;
+import java.util.stream.IntStream;
+
+import static org.assertj.core.api.Assertions.assertThat;
+import static org.mockito.ArgumentMatchers.any;
+import static org.mockito.ArgumentMatchers.eq;
+import static org.mockito.Mockito.*;
+
+class FraudStreamProcessorTest {
+
+    private static final String STREAM_KEY = "deriv:transactions";
+    private static final String CONSUMER_GROUP = "fraud-detector1";
+
+    // VPN from a high-risk country scores 0.25: gray area, goes to the AI queue
+    private static final String GRAY_AREA_EVENT =
+            "{\"transactionId\":\"%s\",\"userId\":\"%s\",\"ipProfile\":{\"vpn\":true,\"highRiskCountry\":true}}";
+    // Sanctioned country is a definitive AUTO_BLOCKED
+    private static final String BLOCKED_EVENT =
+            "{\"transactionId\":\"%s\",\"userId\":\"%s\",\"ipProfile\":{\"sanctionedCountry\":true}}";
+
+    private RedisTemplate<String, String> redisTemplate;
+    private StreamOperations<String, Object, Object> streamOps;
+    private StreamOperations<String, String, String> pipelinedStreamOps;
+    private FraudCaseRepository fraudCaseRepository;
+    private FraudAlertService alertService;
+    private FraudStreamProcessor processor;
+
+    @BeforeEach
+    @SuppressWarnings("unchecked")
+    void setUp() {
+        redisTemplate = mock(RedisTemplate.class);
+        streamOps = mock(StreamOperations.class);
+        doReturn(streamOps).when(redisTemplate).opsForStream();
+
+        RedisOperations<String, String> pipelinedOps = mock(RedisOperations.class);
+        pipelinedStreamOps = mock(StreamOperations.class);
+        doReturn(pipelinedStreamOps).when(pipelinedOps).opsForStream();
+        when(redisTemplate.executePipelined(any(SessionCallback.class))).thenAnswer(inv -> {
+            SessionCallback<Object> callback = inv.getArgument(0);
+            callback.execute(pipelinedOps);
+            return List.of();
+        });
+
+        fraudCaseRepository = mock(FraudCaseRepository.class);
+        when(fraudCaseRepository.saveAndFlush(any(FraudCase.class))).thenAnswer(inv -> inv.getArgument(0));
+
+        alertService = mock(FraudAlertService.class);
+        processor = new FraudStreamProcessor(redisTemplate, fraudCaseRepository,
+                new RedisConfig().objectMapper(), alertService, new TrafficMonitor());
+        processor.initGroup();
+    }
+
+    @Test
+    @SuppressWarnings({"unchecked", "rawtypes"})
+    void queuesEachGrayAreaCaseOnceWithItsOwnCaseId() {
+        givenStreamRecords(
+                record("1-0", GRAY_AREA_EVENT, "TX-1", "U1"),
+                record("2-0", GRAY_AREA_EVENT, "TX-2", "U2"),
+                record("3-0", GRAY_AREA_EVENT, "TX-3", "U3"));
+
+        processor.processWindow();
+
+        ArgumentCaptor<FraudCase> saved = ArgumentCaptor.forClass(FraudCase.class);
+        verify(fraudCaseRepository, times(3)).saveAndFlush(saved.capture());
+
+        ArgumentCaptor<MapRecord<String, String, String>> queued = (ArgumentCaptor) ArgumentCaptor.forClass(MapRecord.class);
+        verify(pipelinedStreamOps, times(3)).add(queued.capture());
+
+        assertThat(queued.getAllValues())
+                .extracting(r -> r.getValue().get("case_id"))
+                .containsExactlyElementsOf(saved.getAllValues().stream().map(FraudCase::getCaseId).toList())
+                .doesNotHaveDuplicates();
+        assertThat(queued.getAllValues())
+                .extracting(r -> r.getValue().get("user_id"))
+                .containsExactly("U1", "U2", "U3");
+
+        verify(streamOps).acknowledge(eq(STREAM_KEY), eq(CONSUMER_GROUP),
+                eq(RecordId.of("1-0")), eq(RecordId.of("2-0")), eq(RecordId.of("3-0")));
+    }
+
+    @Test
+    @SuppressWarnings("unchecked")
+    void flushesAndAcksEveryTenRecords() {
+        givenStreamRecords(IntStream.rangeClosed(1, 12)
+                .mapToObj(i -> record(i + "-0", GRAY_AREA_EVENT, "TX-" + i, "U" + i))
+                .toArray(MapRecord[]::new));
+
+        processor.processWindow();
+
+        verify(redisTemplate, times(2)).executePipelined(any(SessionCallback.class));
+        verify(pipelinedStreamOps, times(12)).add(any(MapRecord.class));
+
+        ArgumentCaptor<RecordId[]> acked = ArgumentCaptor.forClass(RecordId[].class);
+        verify(streamOps, times(2)).acknowledge(eq(STREAM_KEY), eq(CONSUMER_GROUP), acked.capture());
+        assertThat(acked.getAllValues().get(0)).extracting(RecordId::getValue)
+                .containsExactly("1-0", "2-0", "3-0", "4-0", "5-0", "6-0", "7-0", "8-0", "9-0", "10-0");
+        assertThat(acked.getAllValues().get(1)).extracting(RecordId::getValue)
+                .containsExactly("11-0", "12-0");
+    }
+
+    @Test
+    @SuppressWarnings("unchecked")
+    void acksDefinitiveRecordsWhenTheAiQueueFlushFails() {
+        when(redisTemplate.executePipelined(any(SessionCallback.class)))
+                .thenThrow(new RedisConnectionFailureException("redis down"));
+        givenStreamRecords(
+                record("1-0", BLOCKED_EVENT, "TX-1", "U1"),
+                record("2-0", GRAY_AREA_EVENT, "TX-2", "U2"));
+
+        processor.processWindow();
+
+        verify(streamOps).acknowledge(eq(STREAM_KEY), eq(CONSUMER_GROUP), eq(RecordId.of("1-0")));
+    }
+
+    @Test
+    @SuppressWarnings("unchecked")
+    void leavesRecordsPendingWhenTheCaseCannotBeSaved() {
+        when(fraudCaseRepository.saveAndFlush(any(FraudCase.class)))
+                .thenThrow(new RuntimeException("db down"));
+        givenStreamRecords(
+                record("1-0", BLOCKED_EVENT, "TX-1", "U1"),
+                record("2-0", GRAY_AREA_EVENT, "TX-2", "U2"));
+
+        processor.processWindow();
+
+        verify(redisTemplate, never()).executePipelined(any(SessionCallback.class));
+        verify(streamOps, never()).acknowledge(any(String.class), any(String.class), any(RecordId[].class));
+    }
+
+    @Test
+    @SuppressWarnings("unchecked")
+    void queuesAndAcksSavedCasesWhenTheDashboardPushFails() {
+        doThrow(new RuntimeException("websocket down")).when(alertService).pushToDashboard(any(FraudCase.class));
+        givenStreamRecords(record("1-0", GRAY_AREA_EVENT, "TX-1", "U1"));
+
+        processor.processWindow();
+
+        verify(pipelinedStreamOps).add(any(MapRecord.class));
+        verify(streamOps).acknowledge(eq(STREAM_KEY), eq(CONSUMER_GROUP), eq(RecordId.of("1-0")));
+    }
+
+    @SafeVarargs
+    private void givenStreamRecords(MapRecord<String, Object, Object>... records) {
+        doReturn(List.of(records)).when(streamOps)
+                .read(any(Consumer.class), any(StreamReadOptions.class), any(StreamOffset.class));
+    }
+
+    private static MapRecord<String, Object, Object> record(String id, String template, String txId, String userId) {
+        Map<Object, Object> body = Map.of("event_data", String.format(template, txId, userId));
+        return StreamRecords.newRecord().in(STREAM_KEY).withId(RecordId.of(id)).ofMap(body);
+    }
+}